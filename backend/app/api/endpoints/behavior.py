@@ -3,10 +3,16 @@
 API端点，用于接收和处理前端发送的行为事件。
 """
 import logging
-from fastapi import APIRouter, Depends, status, BackgroundTasks
+import re
+from typing import Any, Dict, List, Tuple
+
+import msgspec
+from fastapi import APIRouter, Depends, status, BackgroundTasks, Request
+from fastapi.exceptions import RequestValidationError
 from sqlalchemy.orm import Session
 
 from app.schemas.behavior import BehaviorEvent
+from app.schemas.behavior_msgspec import behavior_batch_decoder, behavior_event_decoder, to_behavior_event
 from app.crud.crud_event import event as crud_event
 from app.services.user_state_service import UserStateService
 from app.services.behavior_interpreter_service import behavior_interpreter_service
@@ -17,10 +23,96 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/log", status_code=status.HTTP_202_ACCEPTED, summary="记录行为事件")
+# 请求体由下方的依赖自行解码，FastAPI 不会为其生成请求体文档。
+# 端点只引用 BehaviorEvent 的 schema，定义由 app.main 在生成 OpenAPI 文档时合并进 components
+_BEHAVIOR_EVENT_REF = {"$ref": "#/components/schemas/BehaviorEvent"}
+
+# msgspec 错误信息末尾的出错位置，如 " - at `$[0].event_data`"
+_ERROR_PATH_PATTERN = re.compile(r" - at `\$(?P<path>[^`]*)`$")
+_ERROR_PATH_PART_PATTERN = re.compile(r"\.(\w+)|\[(\d+)\]")
+
+
+def _request_body(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """构造端点的 openapi_extra 请求体描述"""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+
+def _decode_error_detail(e: msgspec.DecodeError, *loc_prefix: Any) -> Dict[str, Any]:
+    """
+    将 msgspec 的解码错误转换为与 FastAPI 校验错误一致的 {loc, msg, type} 结构。
+
+    Args:
+        e: msgspec 解码或校验错误
+        loc_prefix: 追加在 "body" 之后的位置前缀（如批量上报中的下标）
+
+    Returns:
+        Dict[str, Any]: 单条校验错误
+    """
+    msg = str(e)
+    loc: List[Any] = ["body", *loc_prefix]
+    match = _ERROR_PATH_PATTERN.search(msg)
+    if match:
+        msg = msg[:match.start()]
+        for name, index in _ERROR_PATH_PART_PATTERN.findall(match.group("path")):
+            loc.append(name or int(index))
+    error_type = "value_error" if isinstance(e, msgspec.ValidationError) else "json_invalid"
+    return {"type": error_type, "loc": tuple(loc), "msg": msg, "input": None}
+
+
+def _decode_error(e: msgspec.DecodeError) -> RequestValidationError:
+    """将 msgspec 的解码错误转换为 FastAPI 的请求校验错误，保持 422 响应的 detail 格式一致"""
+    return RequestValidationError([_decode_error_detail(e)])
+
+
+async def decode_behavior_event(request: Request) -> BehaviorEvent:
+    """
+    直接从请求体字节解码行为事件。
+
+    使用 msgspec 按 event_type 标签解码并校验，避免 pydantic 在高频上报路径上的逐字段校验开销。
+    """
+    body = await request.body()
+    try:
+        return to_behavior_event(behavior_event_decoder.decode(body))
+    except msgspec.DecodeError as e:
+        raise _decode_error(e)
+
+
+async def decode_behavior_events(request: Request) -> Tuple[List[BehaviorEvent], List[Dict[str, Any]]]:
+    """
+    从请求体字节解码一批行为事件（JSON 数组）。
+
+    外层不是合法的 JSON 数组时返回 422；数组中的事件逐条解码，无效的事件被跳过并记录日志，
+    不影响同批其余事件。
+
+    Returns:
+        Tuple[List[BehaviorEvent], List[Dict[str, Any]]]: 有效事件列表与无效事件的校验错误列表
+    """
+    body = await request.body()
+    try:
+        raw_events = behavior_batch_decoder.decode(body)
+    except msgspec.DecodeError as e:
+        raise _decode_error(e)
+
+    events: List[BehaviorEvent] = []
+    errors: List[Dict[str, Any]] = []
+    for index, raw_event in enumerate(raw_events):
+        try:
+            events.append(to_behavior_event(behavior_event_decoder.decode(raw_event)))
+        except msgspec.DecodeError as e:
+            logger.warning("Skipped invalid behavior event at index %d: %s", index, e)
+            errors.append(_decode_error_detail(e, index))
+    return events, errors
+
+
+@router.post(
+    "/log",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="记录行为事件",
+    openapi_extra=_request_body(_BEHAVIOR_EVENT_REF)
+)
 def log_behavior(
-    event_in: BehaviorEvent,
     background_tasks: BackgroundTasks,
+    event_in: BehaviorEvent = Depends(decode_behavior_event),
     db: Session = Depends(get_db),
     user_state_service: UserStateService = Depends(get_user_state_service)
 ):
@@ -42,7 +134,39 @@ def log_behavior(
             db_session=db
         )
     except Exception as e:
-        logger.error(f"Error interpreting event for participant {event_in.participant_id}: {e}", exc_info=True)
+        logger.error("Error interpreting event for participant %s: %s", event_in.participant_id, e, exc_info=True)
         # 即使解释失败，事件也已记录，所以不改变响应状态
 
     return {"status": "Event received for processing"}
+
+
+@router.post(
+    "/log/batch",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="批量记录行为事件",
+    openapi_extra=_request_body({"type": "array", "items": _BEHAVIOR_EVENT_REF})
+)
+def log_behavior_batch(
+    background_tasks: BackgroundTasks,
+    decoded: Tuple[List[BehaviorEvent], List[Dict[str, Any]]] = Depends(decode_behavior_events),
+    db: Session = Depends(get_db),
+    user_state_service: UserStateService = Depends(get_user_state_service)
+):
+    """
+    接收、持久化并解释一批行为事件。
+
+    - **批量持久化**: 整批有效事件在一个后台任务中写入数据库，只提交一次事务。
+    - **同步解释**: 按上报顺序逐条交给行为解释服务处理。
+    - **逐条校验**: 无效事件被跳过，其校验错误在响应的 `errors` 中按下标返回。
+    """
+    events_in, errors = decoded
+    if events_in:
+        background_tasks.add_task(crud_event.bulk_create_from_behavior, db=db, objs_in=events_in)
+
+        behavior_interpreter_service.interpret_events(
+            events_in,
+            user_state_service=user_state_service,
+            db_session=db
+        )
+
+    return {"status": "Events received for processing", "count": len(events_in), "errors": errors}
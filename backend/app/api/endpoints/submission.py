@@ -11,6 +11,8 @@ from app.crud.crud_progress import progress as crud_progress
 from app.schemas.user_progress import UserProgressCreate
 from app.schemas.response import StandardResponse
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.post("/submit-test", response_model=StandardResponse[TestSubmissionResponse])
@@ -24,9 +26,9 @@ def submit_test(
     """
     接收用户代码提交，进行评测，更新BKT模型，并返回结果。
     """
-    # 记录提交的代码内容用于调试
-    print(f"Received submission for participant {submission_in.participant_id}, topic {submission_in.topic_id}")
-    print(f"Submitted code: {submission_in.code}")
+    # 记录提交的代码内容用于调试（代码内容仅在 DEBUG 级别输出，参数在日志真正输出时才格式化）
+    logger.info("Received submission for participant %s, topic %s", submission_in.participant_id, submission_in.topic_id)
+    logger.debug("Submitted code: %s", submission_in.code)
     
     # 1. 加载测试内容
     try:
@@ -55,11 +55,15 @@ class Settings(BaseSettings):
     # LLM Settings
     LLM_MAX_TOKENS: int = 65536
     LLM_TEMPERATURE: float = 0.7
+    # 注入系统提示词的RAG检索内容的最大字符数
+    RAG_CONTEXT_MAX_CHARS: int = 6000
 
     # Module enable/disable flags
     ENABLE_RAG_SERVICE: bool = True
     ENABLE_SENTIMENT_ANALYSIS: bool = True
     ENABLE_TRANSLATION_SERVICE: bool = False
+    # 后端内部生成的行为事件（如状态快照）是否走完整 pydantic 校验：生产环境默认关闭，开发/测试时开启
+    VALIDATE_INTERNAL_EVENTS: bool = False
 
 # Create a single, globally accessible instance of the settings.
 # This will raise a validation error on startup if required settings are missing.
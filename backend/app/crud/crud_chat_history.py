@@ -3,9 +3,11 @@ from app.models.chat_history import ChatHistory
 from app.schemas.chat import ChatHistoryCreate
 
 
-def create_chat_history(db: Session, *, obj_in: ChatHistoryCreate) -> ChatHistory:
+def create_chat_history(db: Session, *, obj_in: ChatHistoryCreate, commit: bool = True) -> ChatHistory:
     """
     创建新的聊天历史记录。
+
+    commit 为 False 时只加入会话，由调用方与其他写入一起提交。
     """
     db_obj = ChatHistory(
         participant_id=obj_in.participant_id,
@@ -14,15 +16,16 @@ def create_chat_history(db: Session, *, obj_in: ChatHistoryCreate) -> ChatHistor
         raw_prompt_to_llm=obj_in.raw_prompt_to_llm,
     )
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    if commit:
+        db.commit()
+        db.refresh(db_obj)
     return db_obj
 
 # 将其组织到一个对象中以便于导入
 class CRUDChatHistory:
     @staticmethod
-    def create(db: Session, *, obj_in: ChatHistoryCreate) -> ChatHistory:
-        return create_chat_history(db, obj_in=obj_in)
+    def create(db: Session, *, obj_in: ChatHistoryCreate, commit: bool = True) -> ChatHistory:
+        return create_chat_history(db, obj_in=obj_in, commit=commit)
     
 
 
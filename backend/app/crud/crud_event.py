@@ -1,4 +1,5 @@
 from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from datetime import datetime
 from app.crud.base_improved import CRUDBaseImproved, SortDirection
@@ -116,16 +117,41 @@ class CRUDEvent(CRUDBaseImproved[EventLog, BehaviorEvent, BehaviorEvent]):
             sort_by=[("timestamp", SortDirection.ASC)]
         )
 
-    def create_from_behavior(self, db: Session, *, obj_in: BehaviorEvent) -> EventLog:
+    def create_from_behavior(self, db: Session, *, obj_in: BehaviorEvent, commit: bool = True) -> EventLog:
         """根据行为事件创建事件日志记录。
         
         Args:
             db: 数据库会话
             obj_in: 行为事件数据
+            commit: 是否立即提交；为 False 时只加入会话，由调用方与其他写入一起提交
             
         Returns:
             EventLog: 创建的事件日志记录
         """
-        return self.create(db, obj_in=obj_in)
+        if commit:
+            return self.create(db, obj_in=obj_in)
+        db_obj = self.model(**obj_in.model_dump())
+        db.add(db_obj)
+        return db_obj
+
+    def bulk_create_from_behavior(self, db: Session, *, objs_in: List[BehaviorEvent]) -> int:
+        """根据一批行为事件创建事件日志记录，整批只提交一次事务。
+        
+        使用 ORM 批量 INSERT（不带 RETURNING），整批一条 executemany 写入，
+        不经过逐对象的 unit-of-work flush，也不为插入的行构建 ORM 对象。
+        
+        Args:
+            db: 数据库会话
+            objs_in: 行为事件数据列表
+            
+        Returns:
+            int: 写入的事件日志记录数
+        """
+        if not objs_in:
+            return 0
+        mappings = [obj_in.model_dump() for obj_in in objs_in]
+        db.execute(insert(self.model), mappings)
+        db.commit()
+        return len(mappings)
 
 event = CRUDEvent(EventLog)
@@ -1,17 +1,29 @@
+import msgspec
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
 from typing import Generator
 
+# JSON 列（如 event_logs.event_data）使用 msgspec 编码，比标准库 json.dumps 更快
+_json_encoder = msgspec.json.Encoder()
+
+
+def _json_serializer(obj) -> str:
+    return _json_encoder.encode(obj).decode()
+
+
 # 创建数据库引擎
 # connect_args 是SQLite特有的，用于允许多线程访问
 engine = create_engine(
     settings.DATABASE_URL, 
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False},
+    json_serializer=_json_serializer
 )
 
 # 创建一个Session工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 会话按请求创建、用完即关闭，提交后无需让已加载对象过期重新查询（expire_on_commit=False）；
+# 需要读取提交后数据库生成的最新值时请显式调用 db.refresh(obj)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # FastAPI 依赖项，用于在每个请求中获取数据库会话
 def get_db() -> Generator[Session, None, None]:
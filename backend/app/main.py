@@ -3,6 +3,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.api import api_router
 from app.core.config import settings
+from app.schemas.behavior import behavior_event_json_schemas
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -21,6 +22,23 @@ if settings.BACKEND_CORS_ORIGINS:
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+
+def custom_openapi():
+    """
+    生成 OpenAPI 文档，并补充行为事件端点引用的请求体模型（这些端点自行解码请求体，FastAPI 不会自动收集）。
+
+    文档在首次请求时生成并缓存，行为事件模型的 schema 也在此时才构建，不影响应用启动。
+    """
+    if app.openapi_schema is None:
+        openapi_schema = FastAPI.openapi(app)
+        schemas = openapi_schema.setdefault("components", {}).setdefault("schemas", {})
+        for name, schema in behavior_event_json_schemas().items():
+            schemas.setdefault(name, schema)
+    return app.openapi_schema
+
+
+app.openapi = custom_openapi
+
 if __name__ == '__main__':
     uvicorn.run(
         'app.main:app',
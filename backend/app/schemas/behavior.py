@@ -1,32 +1,32 @@
-from pydantic import BaseModel, Field
-from typing import Dict, Any,Literal, Optional, Union, Literal
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, model_validator
+from pydantic.json_schema import models_json_schema
+from typing import Annotated, Any, Dict, Literal, Optional, Union
 from datetime import datetime
-from enum import Enum
 
-# TODO: 这里的类型可能不对，等恩琪的模块完成之后，需要再改
-class EventType(str, Enum):
-    """行为事件类型枚举
-    
-    根据TDD-II-07文档定义，对应前端behavior_tracker.js捕获的所有事件类型
-    以及后端生成的事件类型（如state_snapshot）
-    """
-    CODE_EDIT = "code_edit"
-    AI_HELP_REQUEST = "ai_help_request"
-    TEST_SUBMISSION = "test_submission"
-    DOM_ELEMENT_SELECT = "dom_element_select"
-    USER_IDLE = "user_idle"
-    PAGE_FOCUS_CHANGE = "page_focus_change"
-    STATE_SNAPSHOT = "state_snapshot"
+from app.core.config import settings
+# EventType 定义在独立模块中，只需要枚举的模块可以直接从 behavior_enums 导入，避免构建全部事件模型
+from app.schemas.behavior_enums import EventType
+
+# 后端内部生成的事件（如状态快照）数据类型已确定，默认跳过 pydantic 校验；
+# 开发/测试时通过配置 VALIDATE_INTERNAL_EVENTS=true 开启完整校验
+VALIDATE_INTERNAL = settings.VALIDATE_INTERNAL_EVENTS
+
+# 所有事件数据模型共用同一份配置
+_EVENT_DATA_CONFIG = ConfigDict(defer_build=True, extra="ignore", frozen=True)
 
 
 class CodeEditData(BaseModel):
     """代码编辑事件数据
     
     Attributes:
-        editor_name: 编辑器名称，如 'html', 'css', 'js'
+        event_type: 事件类型标签，用于判别联合，不参与序列化
+        editor_name: 编辑器名称，取值为 'html', 'css', 'js'
         new_length: 新的代码长度
     """
-    editor_name: str = Field(..., description="编辑器名称")
+    model_config = _EVENT_DATA_CONFIG
+
+    event_type: Literal[EventType.CODE_EDIT] = Field(EventType.CODE_EDIT, exclude=True, description="事件类型标签")
+    editor_name: Literal["html", "css", "js"] = Field(..., description="编辑器名称")
     new_length: int = Field(..., ge=0, description="新的代码长度")
 
 
@@ -34,29 +34,56 @@ class AiHelpRequestData(BaseModel):
     """AI帮助请求数据
     
     Attributes:
+        event_type: 事件类型标签，用于判别联合，不参与序列化
         message: 用户向AI提问的消息内容
     """
+    model_config = _EVENT_DATA_CONFIG
+
+    event_type: Literal[EventType.AI_HELP_REQUEST] = Field(EventType.AI_HELP_REQUEST, exclude=True, description="事件类型标签")
     message: str = Field(..., min_length=1, description="用户向AI提问的消息内容")
 
 
+class CodeBundle(BaseModel):
+    """提交的代码内容
+    
+    Attributes:
+        html: HTML 代码
+        css: CSS 代码
+        js: JavaScript 代码
+    """
+    model_config = _EVENT_DATA_CONFIG
+
+    html: str = Field("", description="HTML 代码")
+    css: str = Field("", description="CSS 代码")
+    js: str = Field("", description="JavaScript 代码")
+
+
 class SubmissionData(BaseModel):
     """测试提交数据
     
     Attributes:
+        event_type: 事件类型标签，用于判别联合，不参与序列化
         topic_id: 知识点ID
         code: 用户提交的代码内容
     """
+    model_config = _EVENT_DATA_CONFIG
+
+    event_type: Literal[EventType.TEST_SUBMISSION] = Field(EventType.TEST_SUBMISSION, exclude=True, description="事件类型标签")
     topic_id: str = Field(..., description="知识点ID")
-    code: Dict[str, str] = Field(..., description="用户提交的代码内容，包含html、css、js")
+    code: CodeBundle = Field(..., description="用户提交的代码内容，包含html、css、js")
 
 
 class DomElementSelectData(BaseModel):
     """DOM元素选择数据
     
     Attributes:
+        event_type: 事件类型标签，用于判别联合，不参与序列化
         tag_name: 选择的DOM元素标签名
         selector: DOM元素选择器
     """
+    model_config = _EVENT_DATA_CONFIG
+
+    event_type: Literal[EventType.DOM_ELEMENT_SELECT] = Field(EventType.DOM_ELEMENT_SELECT, exclude=True, description="事件类型标签")
     tag_name: str = Field(..., description="选择的DOM元素标签名")
     selector: str = Field(..., description="DOM元素选择器")
 
@@ -65,8 +92,12 @@ class UserIdleData(BaseModel):
     """用户闲置数据
     
     Attributes:
+        event_type: 事件类型标签，用于判别联合，不参与序列化
         duration_ms: 闲置时长（毫秒）
     """
+    model_config = _EVENT_DATA_CONFIG
+
+    event_type: Literal[EventType.USER_IDLE] = Field(EventType.USER_IDLE, exclude=True, description="事件类型标签")
     duration_ms: int = Field(..., gt=0, description="闲置时长（毫秒）")
 
 
@@ -74,8 +105,12 @@ class PageFocusChangeData(BaseModel):
     """页面焦点变化数据
     
     Attributes:
+        event_type: 事件类型标签，用于判别联合，不参与序列化
         status: 焦点状态，'focus' 或 'blur'
     """
+    model_config = _EVENT_DATA_CONFIG
+
+    event_type: Literal[EventType.PAGE_FOCUS_CHANGE] = Field(EventType.PAGE_FOCUS_CHANGE, exclude=True, description="事件类型标签")
     status: Literal["focus", "blur"] = Field(..., description="焦点状态")
 
 
@@ -83,21 +118,59 @@ class StateSnapshotData(BaseModel):
     """状态快照数据
     
     Attributes:
+        event_type: 事件类型标签，用于判别联合，不参与序列化
         profile_data: 用户档案数据
     """
+    model_config = _EVENT_DATA_CONFIG
+
+    event_type: Literal[EventType.STATE_SNAPSHOT] = Field(EventType.STATE_SNAPSHOT, exclude=True, description="事件类型标签")
     profile_data: Dict[str, Any] = Field(..., description="用户档案数据")
 
 
-EventDataType = Union[
-    CodeEditData,
-    AiHelpRequestData,
-    SubmissionData,
-    DomElementSelectData,
-    UserIdleData,
-    PageFocusChangeData,
-    StateSnapshotData
+# 以 event_type 为判别字段的联合类型，校验时按标签直接定位到对应的数据模型
+EventDataType = Annotated[
+    Union[
+        CodeEditData,
+        AiHelpRequestData,
+        SubmissionData,
+        DomElementSelectData,
+        UserIdleData,
+        PageFocusChangeData,
+        StateSnapshotData
+    ],
+    Field(discriminator="event_type")
 ]
 
+# 事件类型到数据模型的映射
+EVENT_DATA_MODELS: Dict[EventType, type[BaseModel]] = {
+    EventType.CODE_EDIT: CodeEditData,
+    EventType.AI_HELP_REQUEST: AiHelpRequestData,
+    EventType.TEST_SUBMISSION: SubmissionData,
+    EventType.DOM_ELEMENT_SELECT: DomElementSelectData,
+    EventType.USER_IDLE: UserIdleData,
+    EventType.PAGE_FOCUS_CHANGE: PageFocusChangeData,
+    EventType.STATE_SNAPSHOT: StateSnapshotData,
+}
+
+# 按事件类型预先创建的校验器（核心 schema 仍在首次使用时构建）
+_DATA_VALIDATOR: Dict[EventType, TypeAdapter] = {
+    event_type: TypeAdapter(data_model) for event_type, data_model in EVENT_DATA_MODELS.items()
+}
+
+
+def validate_event_data(event_type: EventType, raw_data: Any) -> BaseModel:
+    """
+    在已知事件类型时直接校验事件数据，跳过联合类型的分发。
+
+    Args:
+        event_type: 事件类型
+        raw_data: 原始事件数据（字典或模型实例）
+
+    Returns:
+        BaseModel: 对应事件类型的数据模型实例
+    """
+    return _DATA_VALIDATOR[event_type].validate_python(raw_data)
+
 
 class BehaviorEvent(BaseModel):
     """
@@ -111,6 +184,7 @@ class BehaviorEvent(BaseModel):
         event_data: 事件数据，根据事件类型有不同的结构
         timestamp: 事件发生的时间戳，可选字段，默认为当前时间
     """
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
     # 与 TDD-II-07 对齐的事件类型枚举（若将来扩展只需在此添加）TODO：ceq可能添加热力图事件（heatmap_snapshot）
     # 使用已定义的 EventType 枚举类
@@ -120,6 +194,67 @@ class BehaviorEvent(BaseModel):
     event_data: EventDataType = Field(..., description="事件数据，根据事件类型有不同的结构")
     timestamp: Optional[datetime] = Field(None, description="事件发生的时间戳，可选字段，默认为当前时间")
 
-    
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    @model_validator(mode="before")
+    @classmethod
+    def _tag_event_data(cls, data: Any) -> Any:
+        """用外层的 event_type 作为 event_data 的判别字段
+
+        前端上报的 event_data 不含 event_type；即使 event_data 自带标签也以外层为准，
+        避免出现 event_type 与 event_data 结构不一致的事件。
+        """
+        if isinstance(data, dict):
+            event_data = data.get("event_data")
+            if isinstance(event_data, dict) and "event_type" in data:
+                data = {**data, "event_data": {**event_data, "event_type": data["event_type"]}}
+        return data
+
+
+def build_internal_event(
+    participant_id: str,
+    event_type: EventType,
+    timestamp: Optional[datetime] = None,
+    **data: Any
+) -> BehaviorEvent:
+    """
+    构造由后端内部生成的行为事件。
+
+    VALIDATE_INTERNAL 为 False 时使用 model_construct 直接构造，跳过校验；否则走完整校验。
+
+    Args:
+        participant_id: 参与者ID
+        event_type: 事件类型
+        timestamp: 事件时间戳
+        **data: 事件数据字段
+
+    Returns:
+        BehaviorEvent: 构造的行为事件
+    """
+    if VALIDATE_INTERNAL:
+        return BehaviorEvent(
+            participant_id=participant_id,
+            event_type=event_type,
+            event_data=validate_event_data(event_type, data),
+            timestamp=timestamp
+        )
+    return BehaviorEvent.model_construct(
+        participant_id=participant_id,
+        event_type=event_type,
+        event_data=EVENT_DATA_MODELS[event_type].model_construct(**data),
+        timestamp=timestamp
+    )
+
+
+def behavior_event_json_schemas(ref_template: str = "#/components/schemas/{model}") -> Dict[str, Any]:
+    """
+    生成 BehaviorEvent 及其 event_data 模型的 JSON Schema 定义，供 OpenAPI 文档使用。
+
+    模型使用 defer_build，调用本函数时才会完成构建，应只在生成文档时调用。
+
+    Args:
+        ref_template: 模型之间相互引用的 $ref 模板
+
+    Returns:
+        Dict[str, Any]: 以模型名为键的 JSON Schema 定义
+    """
+    _, schema = models_json_schema([(BehaviorEvent, "validation")], ref_template=ref_template)
+    return schema["$defs"]
@@ -0,0 +1,155 @@
+"""
+行为事件的 msgspec 镜像结构。
+
+仅用于高频的行为事件摄入路径（POST /behavior/log 与 /behavior/log/batch）：使用 msgspec.Struct 直接从请求体字节解码并校验，
+外层事件按 event_type 做标签联合（tagged union），解码时根据标签一次定位到对应结构，无需逐个尝试。
+解码完成后通过 to_behavior_event 转换为 app.schemas.behavior 中的 pydantic 模型，其余业务代码保持不变。
+
+注意：字段与约束需与 app.schemas.behavior 中的 pydantic 模型保持一致。
+"""
+import sys
+from datetime import UTC, datetime
+from typing import Annotated, Any, Dict, List, Literal, Union
+
+import msgspec
+from pydantic import BaseModel
+
+from app.schemas.behavior import BehaviorEvent, EventType, EVENT_DATA_MODELS
+
+
+class CodeEditData(msgspec.Struct, frozen=True, gc=False):
+    """代码编辑事件数据"""
+    editor_name: Literal["html", "css", "js"]
+    new_length: Annotated[int, msgspec.Meta(ge=0)]
+
+
+class AiHelpRequestData(msgspec.Struct, frozen=True, gc=False):
+    """AI帮助请求数据"""
+    message: Annotated[str, msgspec.Meta(min_length=1)]
+
+
+class CodeBundle(msgspec.Struct, frozen=True, gc=False):
+    """提交的代码内容"""
+    html: str = ""
+    css: str = ""
+    js: str = ""
+
+
+class SubmissionData(msgspec.Struct, frozen=True, gc=False):
+    """测试提交数据"""
+    topic_id: str
+    code: CodeBundle
+
+
+class DomElementSelectData(msgspec.Struct, frozen=True, gc=False):
+    """DOM元素选择数据"""
+    tag_name: str
+    selector: str
+
+
+class UserIdleData(msgspec.Struct, frozen=True, gc=False):
+    """用户闲置数据"""
+    duration_ms: Annotated[int, msgspec.Meta(gt=0)]
+
+
+class PageFocusChangeData(msgspec.Struct, frozen=True, gc=False):
+    """页面焦点变化数据"""
+    status: Literal["focus", "blur"]
+
+
+class StateSnapshotData(msgspec.Struct, frozen=True, gc=False):
+    """状态快照数据"""
+    profile_data: Dict[str, Any]
+
+
+# 毫秒时间戳上限（9999-12-31T23:59:59.999Z），超出后 datetime 无法表示
+MAX_TIMESTAMP_MS = 253402300799999
+
+
+class _BehaviorEventBase(msgspec.Struct, frozen=True, kw_only=True, tag_field="event_type"):
+    """行为事件公共字段，event_type 作为标签字段
+
+    timestamp 既接受 Unix 毫秒时间戳（前端默认发送），也兼容 ISO-8601 字符串。
+    """
+    participant_id: str
+    timestamp: Union[Annotated[int, msgspec.Meta(ge=0, le=MAX_TIMESTAMP_MS)], datetime, None] = None
+
+
+class CodeEditEvent(_BehaviorEventBase, tag=EventType.CODE_EDIT.value):
+    event_data: CodeEditData
+
+
+class AiHelpRequestEvent(_BehaviorEventBase, tag=EventType.AI_HELP_REQUEST.value):
+    event_data: AiHelpRequestData
+
+
+class TestSubmissionEvent(_BehaviorEventBase, tag=EventType.TEST_SUBMISSION.value):
+    event_data: SubmissionData
+
+
+class DomElementSelectEvent(_BehaviorEventBase, tag=EventType.DOM_ELEMENT_SELECT.value):
+    event_data: DomElementSelectData
+
+
+class UserIdleEvent(_BehaviorEventBase, tag=EventType.USER_IDLE.value):
+    event_data: UserIdleData
+
+
+class PageFocusChangeEvent(_BehaviorEventBase, tag=EventType.PAGE_FOCUS_CHANGE.value):
+    event_data: PageFocusChangeData
+
+
+class StateSnapshotEvent(_BehaviorEventBase, tag=EventType.STATE_SNAPSHOT.value):
+    event_data: StateSnapshotData
+
+
+BehaviorEventStruct = Union[
+    CodeEditEvent,
+    AiHelpRequestEvent,
+    TestSubmissionEvent,
+    DomElementSelectEvent,
+    UserIdleEvent,
+    PageFocusChangeEvent,
+    StateSnapshotEvent
+]
+
+# 解码器只需构建一次，可在请求间复用
+behavior_event_decoder = msgspec.json.Decoder(BehaviorEventStruct)
+# 批量上报时只将外层数组解码为原始片段，再用 behavior_event_decoder 逐条解码，
+# 单条事件无效不会导致同批其余事件被丢弃
+behavior_batch_decoder = msgspec.json.Decoder(List[msgspec.Raw])
+
+
+def _construct(model: type[BaseModel], data: msgspec.Struct) -> BaseModel:
+    """按字段将 msgspec 结构构造为对应的 pydantic 模型（嵌套结构递归构造），不做校验"""
+    fields = msgspec.structs.asdict(data)
+    for name, value in fields.items():
+        if isinstance(value, msgspec.Struct):
+            fields[name] = _construct(model.model_fields[name].annotation, value)
+    return model.model_construct(**fields)
+
+
+def to_behavior_event(event: BehaviorEventStruct) -> BehaviorEvent:
+    """
+    将 msgspec 解码得到的事件转换为 pydantic BehaviorEvent。
+
+    数据已由 msgspec 完成校验，这里使用 model_construct 跳过重复校验。
+    participant_id 会被驻留（intern），同一用户的事件共享同一个字符串对象，
+    后续以其为键的状态缓存查找可以直接按指针比较。
+
+    Args:
+        event: msgspec 解码得到的行为事件
+
+    Returns:
+        BehaviorEvent: 对应的 pydantic 行为事件
+    """
+    event_type = EventType(type(event).__struct_config__.tag)
+    timestamp = event.timestamp
+    if isinstance(timestamp, int):
+        timestamp = datetime.fromtimestamp(timestamp / 1000, tz=UTC)
+    return BehaviorEvent.model_construct(
+        participant_id=sys.intern(event.participant_id),
+        event_type=event_type,
+        event_data=_construct(EVENT_DATA_MODELS[event_type], event.event_data),
+        timestamp=timestamp
+    )
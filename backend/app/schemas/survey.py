@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Dict, Any, Optional
 
 
@@ -21,12 +21,11 @@ class SurveyResultUpdate(SurveyResultBase):
 
 class SurveyResultInDBBase(SurveyResultBase):
     """数据库基础问卷结果模型"""
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     submitted_at: Optional[str] = None
 
-    class Config:
-        from_attributes = True
-
 
 class SurveyResult(SurveyResultInDBBase):
     """问卷结果模型"""
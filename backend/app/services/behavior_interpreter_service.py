@@ -22,6 +22,8 @@ from datetime import datetime, timedelta
 import traceback
 from typing import Optional, Any, Dict, Callable
 
+from app.schemas.behavior import SubmissionData
+
 # 规则参数（可在这里调整或从配置中读取）
 FRUSTRATION_WINDOW_MINUTES = 2
 FRUSTRATION_ERROR_RATE_THRESHOLD = 0.75
@@ -87,7 +89,7 @@ class BehaviorInterpreterService:
                 return
                 
         except Exception as e:
-            logger.error(f"BehaviorInterpreterService: 无效的 event 输入：{event}, 错误: {e}")
+            logger.error("BehaviorInterpreterService: 无效的 event 输入：%s, 错误: %s", event, e)
             return
 
         # 使用字典映射来分发事件处理
@@ -104,7 +106,7 @@ class BehaviorInterpreterService:
                             from app.crud.crud_event import event as crud_event  
                             from app.db.database import SessionLocal
                         except ImportError as e:
-                            logger.error(f"BehaviorInterpreterService: 无法导入数据库相关模块: {e}")
+                            logger.error("BehaviorInterpreterService: 无法导入数据库相关模块: %s", e)
                             
                     handler(participant_id, event_data, timestamp, 
                            user_state_service, db_session, crud_event, SessionLocal, is_replay)
@@ -113,24 +115,50 @@ class BehaviorInterpreterService:
                 elif event_type in ("dom_element_select", "code_edit", "page_focus_change", "user_idle"):
                     handler(participant_id, event_type, user_state_service, is_replay)
             except Exception as e:
-                logger.error(f"BehaviorInterpreterService: 处理事件 {event_type} 时发生错误: {e}", exc_info=True)
+                logger.error("BehaviorInterpreterService: 处理事件 %s 时发生错误: %s", event_type, e, exc_info=True)
         else:
             # 默认：不执行任何动作（原始事件仍然会写入 event_logs 以便离线分析）
-            logger.info(f"BehaviorInterpreterService: 未处理的事件类型 {event_type}")
+            logger.info("BehaviorInterpreterService: 未处理的事件类型 %s", event_type)
             return
 
+    def interpret_events(self, events, user_state_service=None, db_session=None, is_replay: bool = False):
+        """
+        批量入口：按顺序解释一批行为事件，整批共用同一个数据库会话。
+        
+        Args:
+            events: BehaviorEvent 实例（或等价 dict）列表，按发生顺序排列
+            user_state_service: UserStateService 实例，用于状态更新操作
+            db_session: 数据库会话，用于挫败检测等需要查询历史数据的操作
+            is_replay: 如果为 True，表示这是从历史回放的事件
+        """
+        for event in events:
+            try:
+                self.interpret_event(
+                    event,
+                    user_state_service=user_state_service,
+                    db_session=db_session,
+                    is_replay=is_replay
+                )
+            except Exception as e:
+                # 单条事件出错不影响同批其余事件
+                logger.error("BehaviorInterpreterService: 批量解释事件时发生错误: %s", e, exc_info=True)
+
     def _handle_test_submission(self, participant_id, event_data, timestamp, 
                                user_state_service, db_session, crud_event, SessionLocal, is_replay):
         """处理测试提交事件"""
         # 从 event_data 中解析 topic_id 与正确性标志
-        # 处理 event_data 可能是 Pydantic 模型或字典的情况
-        topic_id = getattr(event_data, "topic_id", None) or event_data.get("topic_id") or event_data.get("topic") or None
-        # 支持前端可能传的字段名 is_correct 或 passed
         is_correct = None
-        if "is_correct" in event_data:
-            is_correct = bool(event_data.get("is_correct"))
-        elif "passed" in event_data:
-            is_correct = bool(event_data.get("passed"))
+        if isinstance(event_data, SubmissionData):
+            # 已由判别联合校验过的模型，直接读取属性（SubmissionData 不含判题结果）
+            topic_id = event_data.topic_id
+        else:
+            # 字典形式（如测试或历史数据）
+            topic_id = event_data.get("topic_id") or event_data.get("topic") or None
+            # 支持前端可能传的字段名 is_correct 或 passed
+            if "is_correct" in event_data:
+                is_correct = bool(event_data.get("is_correct"))
+            elif "passed" in event_data:
+                is_correct = bool(event_data.get("passed"))
 
         # 1) 更新 BKT：优先调用 UserStateService 中的封装方法
         if user_state_service is not None and topic_id is not None and is_correct is not None:
@@ -139,7 +167,7 @@ class BehaviorInterpreterService:
                 mastery = user_state_service.update_bkt_on_submission(participant_id, topic_id, is_correct)
                 # TODO: 如果需要，可以把 mastery 写入日志或触发其他领域事件
             except Exception as e:
-                logger.error(f"BehaviorInterpreterService: 调用 update_bkt_on_submission 失败：{e}")
+                logger.error("BehaviorInterpreterService: 调用 update_bkt_on_submission 失败：%s", e)
 
         # 2) 挫败检测（PRD：过去 window_minutes 分钟内错误率 > threshold 且 最近两次提交间隔 < interval_seconds）
         # 仅在 is_correct 为 False 时触发检测，且 crud_event 可用时才执行
@@ -193,7 +221,7 @@ class BehaviorInterpreterService:
                         user_state_service.handle_frustration_event(participant_id)
                     
         except Exception as e:
-            logger.error(f"BehaviorInterpreterService: 挫败检测异常（非阻塞）：{e}")
+            logger.error("BehaviorInterpreterService: 挫败检测异常（非阻塞）：%s", e)
             if not is_replay:
                 traceback.print_exc()
         finally:
@@ -211,7 +239,7 @@ class BehaviorInterpreterService:
             if not is_replay:
                 user_state_service.handle_ai_help_request(participant_id)
         except Exception as e:
-            logger.error(f"BehaviorInterpreterService: ai_help_request 处理异常：{e}")
+            logger.error("BehaviorInterpreterService: ai_help_request 处理异常：%s", e)
 
     def _handle_lightweight_event(self, participant_id, event_type, user_state_service, is_replay):
         """处理轻量级事件（如页面焦点变化、代码编辑等）"""
@@ -223,7 +251,7 @@ class BehaviorInterpreterService:
             if not is_replay:
                 user_state_service.handle_lightweight_event(participant_id, event_type)
         except Exception as e:
-            logger.error(f"BehaviorInterpreterService: 轻量事件处理异常：{e}")
+            logger.error("BehaviorInterpreterService: 轻量事件处理异常：%s", e)
 
 # 单例导出
 behavior_interpreter_service = BehaviorInterpreterService()
\ No newline at end of file
@@ -1,6 +1,5 @@
 # backend/app/services/dynamic_controller.py
-import json
-from typing import Any, Optional
+from typing import Any, List, Optional
 from sqlalchemy.orm import Session
 from app.schemas.chat import ChatRequest, ChatResponse, UserStateSummary, SentimentAnalysisResult
 from app.services.sentiment_analysis_service import SentimentAnalysisService
@@ -107,14 +106,12 @@ class DynamicController:
                     loaded_content = load_json_content(content_type, request.content_id)
                     content_title = getattr(loaded_content, 'title', None) or getattr(loaded_content, 'topic_id', None)
                     
-                    # 根据模式处理内容
+                    # 根据模式处理内容，直接传递字典，避免序列化后在提示词生成时再解析
                     if request.mode == "test":
-                        loaded_content_json = loaded_content.model_dump_json()
+                        loaded_content_json = loaded_content.model_dump(mode="json")
                     elif request.mode == "learning":
                         # 移除sc_all字段
-                        learning_content_dict = loaded_content.model_dump()
-                        learning_content_dict.pop('sc_all', None)
-                        loaded_content_json = json.dumps(learning_content_dict)
+                        loaded_content_json = loaded_content.model_dump(mode="json", exclude={'sc_all'})
 
                 except Exception as e:
                     print(f"⚠️ 内容加载失败: {e}")
@@ -250,17 +247,25 @@ class DynamicController:
 
             if background_tasks:
                 # 异步执行
-                background_tasks.add_task(crud_event.create_from_behavior, db=db, obj_in=event)
-                background_tasks.add_task(crud_chat_history.create, db=db, obj_in=user_chat)
-                background_tasks.add_task(crud_chat_history.create, db=db, obj_in=ai_chat)
+                background_tasks.add_task(self._save_ai_interaction, db=db, event=event, chats=[user_chat, ai_chat])
                 print(f"INFO: AI interaction for {request.participant_id} logged asynchronously.")
             else:
                 # 同步执行 (备用)
-                crud_event.create_from_behavior(db=db, obj_in=event)
-                crud_chat_history.create(db=db, obj_in=user_chat)
-                crud_chat_history.create(db=db, obj_in=ai_chat)
+                self._save_ai_interaction(db=db, event=event, chats=[user_chat, ai_chat])
                 print(f"WARNING: AI interaction for {request.participant_id} logged synchronously.")
 
         except Exception as e:
             # 数据保存失败必须报错，科研数据完整性优先
-            raise RuntimeError(f"Failed to log AI interaction for {request.participant_id}: {e}")
\ No newline at end of file
+            raise RuntimeError(f"Failed to log AI interaction for {request.participant_id}: {e}")
+
+    @staticmethod
+    def _save_ai_interaction(db: Session, event: BehaviorEvent, chats: List[ChatHistoryCreate]):
+        """在同一个事务中写入AI求助事件及对应的聊天记录，只提交一次"""
+        try:
+            crud_event.create_from_behavior(db=db, obj_in=event, commit=False)
+            for chat in chats:
+                crud_chat_history.create(db=db, obj_in=chat, commit=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
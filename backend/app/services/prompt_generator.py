@@ -1,15 +1,18 @@
 # backend/app/services/prompt_generator.py
+import functools
+import io
 import json
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Union
+
+import orjson
+from ..core.config import settings
 from ..schemas.chat import UserStateSummary, SentimentAnalysisResult
 from ..schemas.content import CodeContent
 
 
-class PromptGenerator:
-    """提示词生成器"""
-
-    def __init__(self):
-        self.base_system_prompt = """
+# 固定的提示词片段定义为模块级常量，只创建一次；基础提示词始终作为系统提示词的第一段原样输出，
+# 保证跨请求的前缀完全一致，便于模型服务端的提示词缓存命中
+BASE_SYSTEM_PROMPT = """
 "You are 'Alex', a world-class AI programming tutor. Your goal is to help a student master a specific topic by providing personalized, empathetic, and insightful guidance. You must respond in Markdown format.
 
 ## STRICT RULES
@@ -23,6 +26,93 @@ Be an approachable-yet-dynamic teacher, who helps the user learn by guiding them
 Above all: DO NOT DO THE USER'S WORK FOR THEM. Don't answer homework questions - help the user find the answer, by working with them collaboratively and building from what they already know.
 """
 
+NEW_STUDENT_INFO = "STUDENT INFO: This is a new student. Start with basic concepts and be extra patient."
+EXISTING_STUDENT_INFO = "STUDENT INFO: This is an existing student. Build upon previous knowledge."
+
+REFERENCE_KNOWLEDGE_PREFIX = "REFERENCE KNOWLEDGE: Use the following information from the knowledge base to answer the user's question accurately.\n\n"
+NO_REFERENCE_KNOWLEDGE = "REFERENCE KNOWLEDGE: No relevant knowledge was retrieved from the knowledge base. Answer based on your general knowledge."
+
+LEARNING_MODE_PROMPT = "MODE: The student is in learning mode. Provide detailed explanations and examples to help them understand the concepts."
+TEST_MODE_PROMPT = "MODE: The student is in test mode. Guide them to find the answer themselves. Do not give the answer directly."
+
+# 分阶段debug策略，按学生在当前内容上的提问次数索引（其余情况均使用最后一条）
+DEBUGGING_STRATEGIES = (
+    "DEBUGGING STRATEGY: This is the first time the student is asking about this. Provide a small hint.",
+    "DEBUGGING STRATEGY: The student is asking again. Provide a more specific hint or a guiding question.",
+    "DEBUGGING STRATEGY: The student is still stuck. Provide a code snippet with a small modification, but not the complete answer.",
+    "DEBUGGING STRATEGY: The student is asking multiple times. It's time to provide the correct answer, but also explain why it is correct.",
+)
+
+CONTENT_DATA_PREFIX = "CONTENT DATA: Here is the detailed content data for the current topic. Use this to provide more specific and accurate guidance.\n"
+TEST_RESULTS_PREFIX = "TEST RESULTS: Here are the test results for the student's current code. Use this information to help diagnose problems and provide targeted guidance.\n"
+
+# 不同情感对应的教学策略，键为大写的情感标签
+EMOTION_STRATEGIES = {
+    'FRUSTRATED': "The student seems frustrated. Your top priority is to validate their feelings and be encouraging. Acknowledge the difficulty before offering help. Use phrases like 'I can see why this is frustrating, it's a tough concept' or 'Let's take a step back and try a different angle'. Avoid saying 'it's easy' or dismissing their struggle.",
+    'CONFUSED': "The student seems confused. Your first step is to ask questions to pinpoint the source of confusion (e.g., 'Where did I lose you?' or 'What part of that example felt unclear?'). Then, break down concepts into smaller, simpler steps. Use analogies and the simplest possible examples. Avoid jargon.",
+    'EXCITED': "The student seems excited and engaged. Praise their curiosity and capitalize on their momentum. Challenge them with deeper explanations or a more complex problem. Connect the concept to a real-world application or a related advanced topic to broaden their perspective.",
+    'NEUTRAL': "The student seems neutral. Maintain a clear, structured teaching approach, but proactively try to spark interest by relating the topic to a surprising fact or a practical application. Frequently check for understanding with specific questions like 'Can you explain that back to me in your own words?' or 'How would you apply this to...?'"
+}
+
+# 系统提示词各段之间的分隔符
+SECTION_SEPARATOR = "\n\n"
+
+
+def _trim_reference_context(chunks: List[str], budget: int) -> List[str]:
+    """
+    按检索相关度顺序选取知识片段，使总字符数不超过预算
+
+    放不下的片段会被跳过，继续尝试后面更短的片段；最相关的片段至少保留其截断后的部分。
+
+    Args:
+        chunks: 按相关度从高到低排列的知识片段
+        budget: 最大字符数
+
+    Returns:
+        List[str]: 选取的知识片段，保持原有顺序
+    """
+    selected = []
+    remaining = budget
+    for chunk in chunks:
+        if len(chunk) <= remaining:
+            selected.append(chunk)
+            remaining -= len(chunk)
+        elif not selected:
+            selected.append(chunk[:remaining])
+            remaining = 0
+        if remaining <= 0:
+            break
+    return selected
+
+
+def _dump_json(data: Any) -> str:
+    """将数据格式化为缩进2格、保留中文的JSON字符串，orjson 不支持的数据退回标准库"""
+    try:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    except TypeError:
+        return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+@functools.lru_cache(maxsize=128)
+def _format_content_json(content_json: str) -> str:
+    """
+    格式化内容JSON字符串，同一知识点的多轮对话直接命中缓存
+
+    Args:
+        content_json: 内容的JSON字符串
+
+    Returns:
+        str: 格式化后的JSON字符串；解析失败时原样返回
+    """
+    try:
+        return _dump_json(orjson.loads(content_json))
+    except orjson.JSONDecodeError:
+        return content_json
+
+
+class PromptGenerator:
+    """提示词生成器"""
+
     def create_prompts(
         self,
         user_state: UserStateSummary,
@@ -32,7 +122,7 @@ Above all: DO NOT DO THE USER'S WORK FOR THEM. Don't answer homework questions -
         code_content: CodeContent = None,
         mode: str = None,
         content_title: str = None,
-        content_json: str = None,
+        content_json: Union[str, Dict[str, Any]] = None,
         test_results: List[Dict[str, Any]] = None
     ) -> Tuple[str, List[Dict[str, str]]]:
         """
@@ -46,7 +136,7 @@ Above all: DO NOT DO THE USER'S WORK FOR THEM. Don't answer homework questions -
             code_content: 代码上下文
             mode: 模式 ("learning" 或 "test")
             content_title: 内容标题
-            content_json: 内容的JSON字符串
+            content_json: 内容数据，可以是JSON字符串或已解析的字典
 
         Returns:
             Tuple[str, List[Dict[str, str]]]: (system_prompt, messages)
@@ -76,28 +166,75 @@ Above all: DO NOT DO THE USER'S WORK FOR THEM. Don't answer homework questions -
         retrieved_context: List[str],
         mode: str = None,
         content_title: str = None,
-        content_json: str = None,
+        content_json: Union[str, Dict[str, Any]] = None,
         test_results: List[Dict[str, Any]] = None
     ) -> str:
-        """构建系统提示词"""
-        prompt_parts = [self.base_system_prompt]
+        """
+        构建系统提示词
+
+        各段按跨轮次的稳定程度排序：基础提示词、模式、知识点内容等在同一会话中保持不变的部分在前，
+        检索结果次之，学生状态与测试结果等每轮变化的部分在后，使提示词前缀尽可能稳定，便于模型服务端缓存命中。
+        """
+        # 各段之间以空行分隔，片段直接写入缓冲区，避免为每段拼接中间字符串
+        buf = io.StringIO()
+        w = buf.write
+        w(BASE_SYSTEM_PROMPT)
+
+        bkt_models = getattr(user_state, 'bkt_models', None) or {}
+        counters = getattr(user_state, 'behavior_counters', None) or {}
+
+        # 添加任务模式
+        if mode == "learning":
+            w(SECTION_SEPARATOR)
+            w(LEARNING_MODE_PROMPT)
+        elif mode == "test":
+            w(SECTION_SEPARATOR)
+            w(TEST_MODE_PROMPT)
+
+        # 添加内容标题
+        if content_title:
+            w(SECTION_SEPARATOR)
+            w("TOPIC: The current topic is '")
+            w(content_title)
+            w("'. Focus your explanations on this specific topic.")
+
+        # 添加内容JSON（如果提供）
+        if content_json:
+            # 重新格式化为缩进的JSON字符串，确保中文正确显示；已解析的字典无需再反序列化
+            if isinstance(content_json, dict):
+                formatted_content_json = _dump_json(content_json)
+            else:
+                formatted_content_json = _format_content_json(content_json)
+            w(SECTION_SEPARATOR)
+            w(CONTENT_DATA_PREFIX)
+            w(formatted_content_json)
+
+        # 添加RAG上下文（随提问变化，位于会话内不变的部分之后、学生状态之前）
+        w(SECTION_SEPARATOR)
+        if retrieved_context:
+            w(REFERENCE_KNOWLEDGE_PREFIX)
+            w("\n\n---\n\n".join(_trim_reference_context(retrieved_context, settings.RAG_CONTEXT_MAX_CHARS)))
+        else:
+            w(NO_REFERENCE_KNOWLEDGE)
 
         # 添加情感策略
-        emotion = user_state.emotion_state.get('current_sentiment', 'NEUTRAL')
-        emotion_strategy = PromptGenerator._get_emotion_strategy(emotion)
-        prompt_parts.append(f"STRATEGY: {emotion_strategy}")
+        emotion = user_state.emotion_state.get('current_sentiment') or 'NEUTRAL'
+        w(SECTION_SEPARATOR)
+        w("STRATEGY: ")
+        w(PromptGenerator._get_emotion_strategy(emotion))
 
         # 添加用户状态信息
+        w(SECTION_SEPARATOR)
         if user_state.is_new_user:
-            prompt_parts.append("STUDENT INFO: This is a new student. Start with basic concepts and be extra patient.")
+            w(NEW_STUDENT_INFO)
         else:
             # 添加更多用户状态信息
-            student_info_parts = ["STUDENT INFO: This is an existing student. Build upon previous knowledge."]
+            w(EXISTING_STUDENT_INFO)
 
             # 添加学习进度信息
-            if hasattr(user_state, 'bkt_models') and user_state.bkt_models:
+            if bkt_models:
                 mastery_info = []
-                for topic_key, bkt_model in user_state.bkt_models.items():
+                for topic_key, bkt_model in bkt_models.items():
                     if isinstance(bkt_model, dict) and 'mastery_prob' in bkt_model:
                         mastery_prob = bkt_model['mastery_prob']
                     elif hasattr(bkt_model, 'mastery_prob'):
@@ -114,12 +251,12 @@ Above all: DO NOT DO THE USER'S WORK FOR THEM. Don't answer homework questions -
                     mastery_info.append(f"{topic_key}: {mastery_level} (mastery: {mastery_prob:.2f})")
                 
                 if mastery_info:
-                    student_info_parts.append(f"LEARNING PROGRESS: Student's mastery levels - {', '.join(mastery_info)}")
+                    w("\nLEARNING PROGRESS: Student's mastery levels - ")
+                    w(", ".join(mastery_info))
 
             # 添加行为计数器信息
-            if hasattr(user_state, 'behavior_counters') and user_state.behavior_counters:
+            if counters:
                 behavior_info = []
-                counters = user_state.behavior_counters
 
                 # 错误计数
                 if 'error_count' in counters:
@@ -131,69 +268,32 @@ Above all: DO NOT DO THE USER'S WORK FOR THEM. Don't answer homework questions -
                     behavior_info.append(f"submissions: {submission_count}")
 
                 if behavior_info:
-                    student_info_parts.append(f"BEHAVIOR: Student has {', '.join(behavior_info)}")
-
-            prompt_parts.append("\n".join(student_info_parts))
-
-        # 添加RAG上下文 (在用户状态信息之后，任务上下文之前)
-        if retrieved_context:
-            formatted_context = "\n\n---\n\n".join(retrieved_context)
-            prompt_parts.append(f"REFERENCE KNOWLEDGE: Use the following information from the knowledge base to answer the user's question accurately.\n\n{formatted_context}")
-        else:
-            prompt_parts.append("REFERENCE KNOWLEDGE: No relevant knowledge was retrieved from the knowledge base. Answer based on your general knowledge.")
-
-        # 添加任务上下文和分阶段debug逻辑
-        if mode == "learning":
-            prompt_parts.append("MODE: The student is in learning mode. Provide detailed explanations and examples to help them understand the concepts.")
-        elif mode == "test":
-            prompt_parts.append("MODE: The student is in test mode. Guide them to find the answer themselves. Do not give the answer directly.")
-            # 分阶段debug逻辑
-            question_count = user_state.behavior_counters.get(f"question_count_{content_title}", 0)
-            if question_count == 0:
-                prompt_parts.append("DEBUGGING STRATEGY: This is the first time the student is asking about this. Provide a small hint.")
-            elif question_count == 1:
-                prompt_parts.append("DEBUGGING STRATEGY: The student is asking again. Provide a more specific hint or a guiding question.")
-            elif question_count == 2:
-                prompt_parts.append("DEBUGGING STRATEGY: The student is still stuck. Provide a code snippet with a small modification, but not the complete answer.")
+                    w("\nBEHAVIOR: Student has ")
+                    w(", ".join(behavior_info))
+
+        # 分阶段debug逻辑（依赖学生在当前内容上的提问次数）
+        if mode == "test":
+            question_count = counters.get(f"question_count_{content_title}", 0)
+            w(SECTION_SEPARATOR)
+            if 0 <= question_count < len(DEBUGGING_STRATEGIES):
+                w(DEBUGGING_STRATEGIES[question_count])
             else:
-                prompt_parts.append("DEBUGGING STRATEGY: The student is asking multiple times. It's time to provide the correct answer, but also explain why it is correct.")
-        
-        # 添加内容标题
-        if content_title:
-            prompt_parts.append(f"TOPIC: The current topic is '{content_title}'. Focus your explanations on this specific topic.")
-            
-        # 添加内容JSON（如果提供）
-        if content_json:
-            # 确保JSON内容正确编码，避免Unicode转义序列问题
-            try:
-                # 解析JSON字符串
-                content_dict = json.loads(content_json)
-                # 重新序列化为格式化的JSON字符串，确保中文正确显示
-                formatted_content_json = json.dumps(content_dict, indent=2, ensure_ascii=False)
-                prompt_parts.append(f"CONTENT DATA: Here is the detailed content data for the current topic. Use this to provide more specific and accurate guidance.\n{formatted_content_json}")
-            except json.JSONDecodeError:
-                # 如果解析失败，使用原始内容
-                prompt_parts.append(f"CONTENT DATA: Here is the detailed content data for the current topic. Use this to provide more specific and accurate guidance.\n{content_json}")
-            
+                w(DEBUGGING_STRATEGIES[-1])
+
         # 添加测试结果（如果提供且在测试模式下）
         if mode == "test" and test_results:
             # 将测试结果转换为格式化的字符串
-            test_results_str = json.dumps(test_results, indent=2, ensure_ascii=False)
-            prompt_parts.append(f"TEST RESULTS: Here are the test results for the student's current code. Use this information to help diagnose problems and provide targeted guidance.\n{test_results_str}")
+            w(SECTION_SEPARATOR)
+            w(TEST_RESULTS_PREFIX)
+            w(_dump_json(test_results))
 
-        return "\n\n".join(prompt_parts)
+        return buf.getvalue()
 
     @staticmethod
+    @functools.lru_cache(maxsize=16)
     def _get_emotion_strategy(emotion: str) -> str:
         """根据情感获取教学策略"""
-        strategies = {
-            'FRUSTRATED': "The student seems frustrated. Your top priority is to validate their feelings and be encouraging. Acknowledge the difficulty before offering help. Use phrases like 'I can see why this is frustrating, it's a tough concept' or 'Let's take a step back and try a different angle'. Avoid saying 'it's easy' or dismissing their struggle.",
-            'CONFUSED': "The student seems confused. Your first step is to ask questions to pinpoint the source of confusion (e.g., 'Where did I lose you?' or 'What part of that example felt unclear?'). Then, break down concepts into smaller, simpler steps. Use analogies and the simplest possible examples. Avoid jargon.",
-            'EXCITED': "The student seems excited and engaged. Praise their curiosity and capitalize on their momentum. Challenge them with deeper explanations or a more complex problem. Connect the concept to a real-world application or a related advanced topic to broaden their perspective.",
-            'NEUTRAL': "The student seems neutral. Maintain a clear, structured teaching approach, but proactively try to spark interest by relating the topic to a surprising fact or a practical application. Frequently check for understanding with specific questions like 'Can you explain that back to me in your own words?' or 'How would you apply this to...?'"
-        }
-
-        return strategies.get(emotion.upper(), strategies['NEUTRAL'])
+        return EMOTION_STRATEGIES.get(emotion.upper(), EMOTION_STRATEGIES['NEUTRAL'])
 
     def _build_message_history(
         self,
@@ -202,15 +302,12 @@ Above all: DO NOT DO THE USER'S WORK FOR THEM. Don't answer homework questions -
         user_message: str = ""
     ) -> List[Dict[str, str]]:
         """构建消息历史"""
-        messages = []
-
-        # 添加历史对话
-        for msg in conversation_history:
-            if isinstance(msg, dict) and 'role' in msg and 'content' in msg:
-                messages.append({
-                    "role": msg['role'],
-                    "content": msg['content']
-                })
+        # 添加历史对话；上游已整理为只含 role/content 的字典时直接复用，不再逐条复制
+        messages = [
+            msg if len(msg) == 2 else {"role": msg['role'], "content": msg['content']}
+            for msg in conversation_history or ()
+            if isinstance(msg, dict) and 'role' in msg and 'content' in msg
+        ]
 
         # 构建当前用户消息
         current_user_content = user_message
@@ -115,9 +115,9 @@ class UserStateService:
             # 设置挫败状态
             profile.emotion_state['is_frustrated'] = True
             
-            logger.info(f"UserStateService: 标记用户 {participant_id} 为挫败状态")
+            logger.info("UserStateService: 标记用户 %s 为挫败状态", participant_id)
         except Exception as e:
-            logger.error(f"UserStateService: 处理挫败事件时发生错误: {e}")
+            logger.error("UserStateService: 处理挫败事件时发生错误: %s", e)
 
     def handle_ai_help_request(self, participant_id: str, content_title: str = None):
         """
@@ -141,9 +141,9 @@ class UserStateService:
                 profile.behavior_counters.setdefault(counter_key, 0)
                 profile.behavior_counters[counter_key] += 1
             
-            logger.info(f"UserStateService: 增加用户 {participant_id} 的求助计数")
+            logger.info("UserStateService: 增加用户 %s 的求助计数", participant_id)
         except Exception as e:
-            logger.error(f"UserStateService: 处理AI求助请求事件时发生错误: {e}")
+            logger.error("UserStateService: 处理AI求助请求事件时发生错误: %s", e)
 
     def handle_lightweight_event(self, participant_id: str, event_type: str):
         """
@@ -169,9 +169,9 @@ class UserStateService:
             if counter_key:
                 profile.behavior_counters.setdefault(counter_key, 0)
                 profile.behavior_counters[counter_key] += 1
-                logger.info(f"UserStateService: 增加用户 {participant_id} 的 {counter_key} 计数")
+                logger.info("UserStateService: 增加用户 %s 的 %s 计数", participant_id, counter_key)
         except Exception as e:
-            logger.error(f"UserStateService: 处理轻量级事件时发生错误: {e}")
+            logger.error("UserStateService: 处理轻量级事件时发生错误: %s", e)
 
     def get_or_create_profile(self, participant_id: str, db: Session = None, group: str = "experimental") -> tuple[StudentProfile, bool]:
         """
@@ -203,7 +203,7 @@ class UserStateService:
                     participant_obj = participant.create(db, obj_in=create_schema)
                     is_new_user = True
         
-            logger.info(f"Cache miss for {participant_id}. Attempting recovery from history.")
+            logger.info("Cache miss for %s. Attempting recovery from history.", participant_id)
             # 只有在提供了数据库会话时才从数据库恢复状态
             if db is not None:
                 # 强制从数据库恢复状态。此方法会处理老用户的状态恢复，也会为新用户创建Profile。
@@ -232,7 +232,7 @@ class UserStateService:
         
         if latest_snapshot:
             # 2a. 如果找到快照，从快照恢复
-            logger.info(f"Found snapshot for {participant_id}. Restoring from snapshot...")
+            logger.info("Found snapshot for %s. Restoring from snapshot...", participant_id)
             # 反序列化快照数据
             # 检查 event_data 是否是 StateSnapshotData 实例或字典
             if isinstance(latest_snapshot.event_data, dict) and 'profile_data' in latest_snapshot.event_data:
@@ -250,22 +250,22 @@ class UserStateService:
                 timestamp=latest_snapshot.timestamp
             )
             
-            logger.info(f"Found {len(events_after_snapshot)} events to replay after snapshot for {participant_id}.")
+            logger.info("Found %d events to replay after snapshot for %s.", len(events_after_snapshot), participant_id)
         else:
             # 2b. 如果没有快照，检查是否有历史事件
-            logger.info(f"No snapshot found for {participant_id}. Checking for history...")
+            logger.info("No snapshot found for %s. Checking for history...", participant_id)
             
             # 获取所有历史事件来判断是否是新用户
             all_history_events = crud_event.get_by_participant(db, participant_id=participant_id)
             
             if all_history_events:
                 # 如果有历史事件，说明不是新用户
-                logger.info(f"Found {len(all_history_events)} historical events for {participant_id}. Not a new user.")
+                logger.info("Found %d historical events for %s. Not a new user.", len(all_history_events), participant_id)
                 temp_profile = StudentProfile(participant_id, is_new_user=False)
                 self._state_cache[participant_id] = temp_profile
             else:
                 # 如果没有历史事件，说明是新用户
-                logger.info(f"No history found for {participant_id}. This is a new user.")
+                logger.info("No history found for %s. This is a new user.", participant_id)
                 temp_profile = StudentProfile(participant_id, is_new_user=True)
                 self._state_cache[participant_id] = temp_profile
             
@@ -273,7 +273,7 @@ class UserStateService:
             events_after_snapshot = all_history_events or []
             
         if not events_after_snapshot:
-            logger.info(f"No events to replay for {participant_id}.")
+            logger.info("No events to replay for %s.", participant_id)
             return  # 没有事件需要回放
         
         # 4. 回放事件
@@ -299,7 +299,7 @@ class UserStateService:
                         event_schema = BehaviorEvent.model_validate(event)
                 except Exception:
                     # 如果验证失败（例如在测试中使用mock对象），则跳过该事件
-                    logger.warning(f"Failed to validate event {event}. Skipping.")
+                    logger.warning("Failed to validate event %s. Skipping.", event)
                     continue
             # 调用解释器，但在回放模式下
             behavior_interpreter_service.interpret_event(
@@ -309,7 +309,7 @@ class UserStateService:
                 is_replay=True
             )
         
-        logger.info(f"Recovery complete for {participant_id}.")
+        logger.info("Recovery complete for %s.", participant_id)
 
     def _maybe_create_snapshot(self, participant_id: str, db: Session, background_tasks=None):
         """根据策略判断是否需要创建快照"""
@@ -347,36 +347,52 @@ class UserStateService:
         if (event_count_since_snapshot >= self.SNAPSHOT_EVENT_INTERVAL or 
             time_since_last_snapshot >= self.SNAPSHOT_TIME_INTERVAL):
             
-            logger.info(f"Creating snapshot for {participant_id}...")
+            logger.info("Creating snapshot for %s...", participant_id)
             
             # 创建快照事件
-            from ..schemas.behavior import EventType, StateSnapshotData
-            snapshot_event = BehaviorEvent(
-                participant_id=participant_id,
-                event_type=EventType.STATE_SNAPSHOT,
-                event_data=StateSnapshotData(profile_data=profile.to_dict()),
-                timestamp=datetime.now(UTC)
+            from ..schemas.behavior import EventType, build_internal_event
+            snapshot_event = build_internal_event(
+                participant_id,
+                EventType.STATE_SNAPSHOT,
+                timestamp=datetime.now(UTC),
+                profile_data=profile.to_dict()
             )
             
-            # 异步保存快照
+            # 异步保存快照（写入新快照与清理旧快照在同一事务中完成）
             if background_tasks:
                 from fastapi import BackgroundTasks
                 if isinstance(background_tasks, BackgroundTasks):
-                    background_tasks.add_task(crud_event.create_from_behavior, db=db, obj_in=snapshot_event)
+                    background_tasks.add_task(self._save_snapshot, participant_id=participant_id, db=db, snapshot_event=snapshot_event)
                 else:
                     # 兼容其他后台任务机制
-                    background_tasks.add_task(crud_event.create_from_behavior, db, snapshot_event)
-                logger.info(f"Snapshot scheduled for async save: {participant_id}")
+                    background_tasks.add_task(self._save_snapshot, participant_id, db, snapshot_event)
+                logger.info("Snapshot scheduled for async save: %s", participant_id)
             else:
                 # 同步保存（备用方案）
-                crud_event.create_from_behavior(db, obj_in=snapshot_event)
-                logger.info(f"Snapshot created for {participant_id}")
-            
-            # 清理旧快照
+                self._save_snapshot(participant_id, db, snapshot_event)
+                logger.info("Snapshot created for %s", participant_id)
+
+    def _save_snapshot(self, participant_id: str, db: Session, snapshot_event: BehaviorEvent):
+        """
+        保存快照并清理旧快照，两者在同一事务中提交。
+        
+        Args:
+            participant_id: 参与者ID
+            db: 数据库会话
+            snapshot_event: 快照事件
+        """
+        try:
+            crud_event.create_from_behavior(db, obj_in=snapshot_event, commit=False)
+            # 先 flush，使新快照参与“保留最新N个”的计算
+            db.flush()
             self._cleanup_old_snapshots(participant_id, db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
 
     def _cleanup_old_snapshots(self, participant_id: str, db: Session, keep_latest: int = 3):
-        """清理旧的快照，只保留最新的N个"""
+        """清理旧的快照，只保留最新的N个；不提交事务，由 _save_snapshot 统一提交"""
         snapshots = crud_event.get_all_snapshots(db, participant_id=participant_id)
         
         if len(snapshots) > keep_latest:
@@ -384,9 +400,9 @@ class UserStateService:
             snapshots_to_delete = snapshots[:-keep_latest]
             
             for snapshot in snapshots_to_delete:
-                crud_event.remove(db, obj_id=snapshot.id)
+                db.delete(snapshot)
             
-            logger.info(f"Cleaned up {len(snapshots_to_delete)} old snapshots for {participant_id}.")
+            logger.info("Cleaned up %d old snapshots for %s.", len(snapshots_to_delete), participant_id)
 
     def update_bkt_on_submission(self, participant_id: str, topic_id: str, is_correct: bool) -> float:
         """
@@ -410,8 +426,9 @@ class UserStateService:
         # 更新BKT模型
         mastery_prob = profile.bkt_model[topic_id].update(is_correct)
         
-        logger.info(f"Updated BKT model for participant {participant_id}, topic {topic_id}. "
-              f"Correct: {is_correct}, New mastery probability: {mastery_prob:.3f}")
+        logger.info("Updated BKT model for participant %s, topic %s. "
+                    "Correct: %s, New mastery probability: %.3f",
+                    participant_id, topic_id, is_correct, mastery_prob)
         
         return mastery_prob
 
@@ -0,0 +1,9 @@
+"""
+测试公共配置
+
+在导入应用配置之前设置测试环境变量。
+"""
+import os
+
+# 测试中对后端内部生成的行为事件做完整校验
+os.environ.setdefault("VALIDATE_INTERNAL_EVENTS", "true")
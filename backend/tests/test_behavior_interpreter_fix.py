@@ -102,6 +102,21 @@ class TestBehaviorInterpreterRefactor:
         # 验证
         mock_user_state_service.handle_lightweight_event.assert_called_once_with(participant_id, event_type)
 
+    def test_interpret_events_processes_batch_in_order(self, interpreter, mock_user_state_service):
+        """验证批量解释按顺序处理，且单条失败不影响其余事件"""
+        events = [
+            {"participant_id": "batch_user", "event_type": "page_focus_change", "event_data": {"status": "blur"}},
+            {"participant_id": "batch_user", "event_type": "user_idle", "event_data": {"duration_ms": 1000}},
+        ]
+        mock_user_state_service.handle_lightweight_event.side_effect = [Exception("boom"), None]
+
+        interpreter.interpret_events(events, mock_user_state_service, MagicMock())
+
+        assert [c.args for c in mock_user_state_service.handle_lightweight_event.call_args_list] == [
+            ("batch_user", "page_focus_change"),
+            ("batch_user", "user_idle"),
+        ]
+
     def test_replay_mode_prevents_delegation(self, interpreter, mock_user_state_service):
         """测试5: 验证在回放模式下，事件处理器不会被调用"""
         participant_id = "replay_user"
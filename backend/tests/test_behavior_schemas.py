@@ -0,0 +1,224 @@
+"""
+行为事件模型测试
+
+验证行为事件在 msgspec 摄入路径上的解码、校验以及向 pydantic 模型的转换。
+"""
+import os
+import sys
+
+import msgspec
+import pytest
+
+# 将 backend 目录添加到 sys.path 中
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from app.schemas.behavior import (
+    BehaviorEvent, EventType, CodeBundle, CodeEditData, StateSnapshotData, UserIdleData, validate_event_data
+)
+from app.schemas.behavior_msgspec import behavior_batch_decoder, behavior_event_decoder, to_behavior_event
+
+
+def test_decode_dispatches_on_event_type():
+    """event_type 标签应直接决定 event_data 的结构"""
+    raw = (
+        b'{"participant_id": "u1", "event_type": "code_edit",'
+        b' "event_data": {"editor_name": "js", "new_length": 10},'
+        b' "timestamp": "2024-01-01T00:00:00.000Z"}'
+    )
+    event = to_behavior_event(behavior_event_decoder.decode(raw))
+
+    assert isinstance(event, BehaviorEvent)
+    assert event.participant_id == "u1"
+    assert event.event_type == EventType.CODE_EDIT
+    assert isinstance(event.event_data, CodeEditData)
+    assert event.event_data.new_length == 10
+    assert event.timestamp.year == 2024
+
+
+def test_decode_epoch_ms_timestamp():
+    """毫秒时间戳与 ISO 字符串应解码为同一时间"""
+    epoch = b'{"participant_id": "u1", "event_type": "user_idle", "event_data": {"duration_ms": 1}, "timestamp": 1704067200000}'
+    iso = b'{"participant_id": "u1", "event_type": "user_idle", "event_data": {"duration_ms": 1}, "timestamp": "2024-01-01T00:00:00Z"}'
+
+    assert to_behavior_event(behavior_event_decoder.decode(epoch)).timestamp == \
+        to_behavior_event(behavior_event_decoder.decode(iso)).timestamp
+
+
+def test_decode_rejects_out_of_range_timestamp():
+    """超出 datetime 可表示范围的毫秒时间戳应在解码时被拒绝"""
+    raw = b'{"participant_id": "u1", "event_type": "user_idle", "event_data": {"duration_ms": 1}, "timestamp": 100000000000000000}'
+
+    with pytest.raises(msgspec.ValidationError):
+        behavior_event_decoder.decode(raw)
+
+
+def test_decode_without_timestamp():
+    raw = b'{"participant_id": "u1", "event_type": "state_snapshot", "event_data": {"profile_data": {"k": 1}}}'
+    event = to_behavior_event(behavior_event_decoder.decode(raw))
+
+    assert event.timestamp is None
+    assert isinstance(event.event_data, StateSnapshotData)
+    assert event.event_data.profile_data == {"k": 1}
+
+
+@pytest.mark.parametrize("raw", [
+    # 未知事件类型
+    b'{"participant_id": "u1", "event_type": "unknown", "event_data": {}}',
+    # 未知编辑器
+    b'{"participant_id": "u1", "event_type": "code_edit", "event_data": {"editor_name": "py", "new_length": 1}}',
+    # 违反约束
+    b'{"participant_id": "u1", "event_type": "code_edit", "event_data": {"editor_name": "js", "new_length": -1}}',
+    # 数据结构与事件类型不匹配
+    b'{"participant_id": "u1", "event_type": "user_idle", "event_data": {"status": "focus"}}',
+    # 非法 JSON
+    b'{"participant_id": ',
+])
+def test_decode_rejects_invalid_events(raw):
+    with pytest.raises(msgspec.DecodeError):
+        behavior_event_decoder.decode(raw)
+
+
+def test_converted_event_dumps_like_validated_event():
+    """转换得到的事件在持久化时应与 pydantic 校验得到的事件一致"""
+    payload = {
+        "participant_id": "u1",
+        "event_type": "test_submission",
+        "event_data": {"topic_id": "1_1", "code": {"html": "<p></p>"}},
+    }
+    converted = to_behavior_event(behavior_event_decoder.decode(msgspec.json.encode(payload)))
+    validated = BehaviorEvent.model_validate(payload)
+
+    assert converted.model_dump() == validated.model_dump()
+
+
+def test_submission_code_fills_missing_editors():
+    raw = b'{"participant_id": "u1", "event_type": "test_submission", "event_data": {"topic_id": "1_1", "code": {"js": "x"}}}'
+    event = to_behavior_event(behavior_event_decoder.decode(raw))
+
+    assert isinstance(event.event_data.code, CodeBundle)
+    assert event.event_data.code.js == "x"
+    assert event.model_dump()["event_data"]["code"] == {"html": "", "css": "", "js": "x"}
+
+
+def test_event_data_resolved_by_event_type():
+    """外层 event_type 决定 event_data 的模型，且标签不会写入持久化数据"""
+    event = BehaviorEvent.model_validate({
+        "participant_id": "u1",
+        "event_type": "code_edit",
+        "event_data": {"editor_name": "css", "new_length": 3},
+    })
+
+    assert isinstance(event.event_data, CodeEditData)
+    assert event.model_dump()["event_data"] == {"editor_name": "css", "new_length": 3}
+
+
+def test_event_data_mismatching_event_type_is_rejected():
+    with pytest.raises(ValueError):
+        BehaviorEvent.model_validate({
+            "participant_id": "u1",
+            "event_type": "user_idle",
+            "event_data": {"editor_name": "css", "new_length": 3},
+        })
+
+
+def test_event_data_inner_tag_cannot_override_event_type():
+    """event_data 中自带的标签不能覆盖外层 event_type"""
+    with pytest.raises(ValueError):
+        BehaviorEvent.model_validate({
+            "participant_id": "u1",
+            "event_type": "code_edit",
+            "event_data": {"event_type": "user_idle", "duration_ms": 5},
+        })
+
+
+@pytest.mark.parametrize("validate", [False, True])
+def test_build_internal_event(monkeypatch, validate):
+    """内部事件无论是否校验，持久化结果都应一致"""
+    from app.schemas import behavior
+
+    monkeypatch.setattr(behavior, "VALIDATE_INTERNAL", validate)
+    event = behavior.build_internal_event(
+        "u1", EventType.STATE_SNAPSHOT, profile_data={"is_new_user": False}
+    )
+
+    assert isinstance(event.event_data, StateSnapshotData)
+    assert event.model_dump() == {
+        "participant_id": "u1",
+        "event_type": EventType.STATE_SNAPSHOT,
+        "event_data": {"profile_data": {"is_new_user": False}},
+        "timestamp": None,
+    }
+
+
+def test_event_data_models_are_frozen():
+    data = CodeEditData(editor_name="js", new_length=1)
+
+    with pytest.raises(ValueError):
+        data.new_length = 2
+
+
+def test_validate_event_data_by_event_type():
+    data = validate_event_data(EventType.USER_IDLE, {"duration_ms": 60000})
+    assert isinstance(data, UserIdleData)
+    assert data.duration_ms == 60000
+
+    with pytest.raises(ValueError):
+        validate_event_data(EventType.USER_IDLE, {"duration_ms": 0})
+
+
+def test_decode_event_batch():
+    raw = (
+        b'[{"participant_id": "u1", "event_type": "user_idle", "event_data": {"duration_ms": 60000}},'
+        b' {"participant_id": "u1", "event_type": "page_focus_change", "event_data": {"status": "blur"}}]'
+    )
+    events = [to_behavior_event(behavior_event_decoder.decode(event)) for event in behavior_batch_decoder.decode(raw)]
+
+    assert [event.event_type for event in events] == [EventType.USER_IDLE, EventType.PAGE_FOCUS_CHANGE]
+    assert isinstance(events[0].event_data, UserIdleData)
+
+
+def test_decoded_participant_ids_are_interned():
+    raw = (
+        b'[{"participant_id": "participant-0001", "event_type": "user_idle", "event_data": {"duration_ms": 1}},'
+        b' {"participant_id": "participant-0001", "event_type": "user_idle", "event_data": {"duration_ms": 2}}]'
+    )
+    first, second = [to_behavior_event(behavior_event_decoder.decode(event)) for event in behavior_batch_decoder.decode(raw)]
+
+    assert first.participant_id is second.participant_id
+
+
+def test_decode_error_keeps_fastapi_detail_shape():
+    """msgspec 错误应转换为带 loc/msg/type 的请求校验错误"""
+    from app.api.endpoints.behavior import _decode_error
+
+    raw = b'{"participant_id": "u1", "event_type": "code_edit", "event_data": {"editorName": "js"}}'
+    with pytest.raises(msgspec.ValidationError) as exc_info:
+        behavior_event_decoder.decode(raw)
+    errors = _decode_error(exc_info.value).errors()
+
+    assert errors[0]["loc"] == ("body", "event_data")
+    assert errors[0]["type"] == "value_error"
+    assert "editor_name" in errors[0]["msg"]
+
+
+def test_decode_event_batch_skips_invalid_events():
+    """批量上报中的无效事件被跳过，不影响同批其余事件"""
+    import asyncio
+    from app.api.endpoints.behavior import decode_behavior_events
+
+    raw = (
+        b'[{"participant_id": "u1", "event_type": "page_focus_change", "event_data": {"status": "blur"}},'
+        b' {"participant_id": "u1", "event_type": "code_edit", "event_data": {"editorName": "js"}},'
+        b' {"participant_id": "u1", "event_type": "ai_help_request", "event_data": {"message": "help"}}]'
+    )
+
+    class _Request:
+        async def body(self):
+            return raw
+
+    events, errors = asyncio.run(decode_behavior_events(_Request()))
+
+    assert [event.event_type for event in events] == [EventType.PAGE_FOCUS_CHANGE, EventType.AI_HELP_REQUEST]
+    assert [error["loc"] for error in errors] == [("body", 1, "event_data")]
@@ -208,6 +208,27 @@ def test_event_log_crud(db: Session):
     print("EventLog CRUD测试通过")
 
 
+def test_event_log_bulk_create(db: Session):
+    """测试批量创建事件日志"""
+    participant_id = f"test_participant_{uuid.uuid4().hex[:8]}"
+    participant.create(db, obj_in=ParticipantCreate(id=participant_id, group="experimental"))
+
+    events_in = [
+        BehaviorEvent(
+            participant_id=participant_id,
+            event_type=EventType.CODE_EDIT,
+            event_data={"editor_name": "css", "new_length": length}
+        )
+        for length in (1, 2, 3)
+    ]
+    created_count = event.bulk_create_from_behavior(db, objs_in=events_in)
+
+    assert created_count == 3
+    stored = event.get_by_participant(db, participant_id=participant_id)
+    assert sorted(e.event_data["new_length"] for e in stored) == [1, 2, 3]
+    assert all(e.timestamp is not None for e in stored)
+
+
 def test_chat_history_crud(db: Session):
     """测试ChatHistory模型的CRUD操作"""
     from app.models.chat_history import ChatHistory
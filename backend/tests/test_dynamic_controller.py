@@ -441,6 +441,7 @@ class TestDynamicController:
         self,
         mock_crud_chat_history,
         mock_crud_event,
+        dynamic_controller,
         sample_chat_request,
         db_session
     ):
@@ -450,7 +451,7 @@ class TestDynamicController:
         system_prompt = "系统提示词"
         
         # 执行
-        DynamicController._log_ai_interaction(
+        dynamic_controller._log_ai_interaction(
             request=sample_chat_request,
             response=response,
             db=db_session,
@@ -487,6 +488,7 @@ class TestDynamicController:
         self,
         mock_crud_chat_history,
         mock_crud_event,
+        dynamic_controller,
         sample_chat_request,
         db_session
     ):
@@ -497,7 +499,7 @@ class TestDynamicController:
         system_prompt = "系统提示词"
         
         # 执行
-        DynamicController._log_ai_interaction(
+        dynamic_controller._log_ai_interaction(
             request=sample_chat_request,
             response=response,
             db=db_session,
@@ -505,18 +507,31 @@ class TestDynamicController:
             system_prompt=system_prompt
         )
         
-        # 验证后台任务被添加
-        assert mock_background_tasks.add_task.call_count == 3
-        
-        # 验证事件记录任务
-        event_task_call = mock_background_tasks.add_task.call_args_list[0]
-        assert event_task_call[0][0] == mock_crud_event.create_from_behavior
-        
-        # 验证聊天历史记录任务
-        chat_task_calls = mock_background_tasks.add_task.call_args_list[1:]
-        assert len(chat_task_calls) == 2
-        assert chat_task_calls[0][0][0] == mock_crud_chat_history.create
-        assert chat_task_calls[1][0][0] == mock_crud_chat_history.create
+        # 验证事件与两条聊天记录在同一个后台任务中写入
+        mock_background_tasks.add_task.assert_called_once()
+        task_call = mock_background_tasks.add_task.call_args
+        assert task_call[0][0] == DynamicController._save_ai_interaction
+        assert task_call[1]['event'].event_type == EventType.AI_HELP_REQUEST
+        assert [chat.role for chat in task_call[1]['chats']] == ["user", "assistant"]
+
+    @patch('app.services.dynamic_controller.crud_event')
+    @patch('app.services.dynamic_controller.crud_chat_history')
+    def test_save_ai_interaction_single_commit(
+        self,
+        mock_crud_chat_history,
+        mock_crud_event
+    ):
+        """测试AI交互的事件与聊天记录只提交一次事务"""
+        db = MagicMock()
+        event = MagicMock()
+        chats = [MagicMock(), MagicMock()]
+
+        DynamicController._save_ai_interaction(db=db, event=event, chats=chats)
+
+        mock_crud_event.create_from_behavior.assert_called_once_with(db=db, obj_in=event, commit=False)
+        assert mock_crud_chat_history.create.call_count == 2
+        assert all(c[1]['commit'] is False for c in mock_crud_chat_history.create.call_args_list)
+        db.commit.assert_called_once()
 
     @patch('app.services.dynamic_controller.crud_event')
     @patch('app.services.dynamic_controller.crud_chat_history')
@@ -524,6 +539,7 @@ class TestDynamicController:
         self,
         mock_crud_chat_history,
         mock_crud_event,
+        dynamic_controller,
         sample_chat_request,
         db_session
     ):
@@ -535,7 +551,7 @@ class TestDynamicController:
         
         # 执行并验证异常
         with pytest.raises(RuntimeError) as exc_info:
-            DynamicController._log_ai_interaction(
+            dynamic_controller._log_ai_interaction(
                 request=sample_chat_request,
                 response=response,
                 db=db_session
@@ -8,7 +8,7 @@ backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if backend_path not in sys.path:
     sys.path.insert(0, backend_path)
 
-from app.services.prompt_generator import PromptGenerator
+from app.services.prompt_generator import PromptGenerator, _trim_reference_context
 from app.schemas.chat import UserStateSummary
 from app.schemas.content import CodeContent
 
@@ -306,6 +306,14 @@ def test_get_emotion_strategy_fallback():
     assert "The student seems neutral" in text
 
 
+def test_trim_reference_context():
+    # 按相关度顺序选取，放不下的片段被跳过
+    assert _trim_reference_context(["aaaa", "bbbbbb", "cc"], budget=7) == ["aaaa", "cc"]
+    # 最相关的片段超出预算时截断保留
+    assert _trim_reference_context(["aaaaaaaaaa", "b"], budget=4) == ["aaaa"]
+    assert _trim_reference_context([], budget=10) == []
+
+
 def test_format_code_context():
     g = PromptGenerator()
     
@@ -322,6 +322,23 @@ class TestUserStateService:
         # 验证清理旧快照的方法被调用
         mock_crud_event.get_all_snapshots.assert_called_once()
 
+    @patch('app.services.user_state_service.crud_event')
+    @patch('app.services.behavior_interpreter_service.BehaviorInterpreterService', MagicMock())
+    def test_save_snapshot_single_commit(self, mock_crud_event, mock_db_session):
+        """
+        测试写入快照与清理旧快照在同一事务中提交。
+        """
+        service = UserStateService()
+        snapshots = [MagicMock(id=i) for i in range(5)]
+        mock_crud_event.get_all_snapshots.return_value = snapshots
+
+        service._save_snapshot("snapshot_user_789", mock_db_session, MagicMock())
+
+        mock_crud_event.create_from_behavior.assert_called_once()
+        assert mock_crud_event.create_from_behavior.call_args.kwargs["commit"] is False
+        assert [c.args[0] for c in mock_db_session.delete.call_args_list] == snapshots[:2]
+        mock_db_session.commit.assert_called_once()
+
     @patch('app.services.user_state_service.crud_event')
     @patch('app.services.behavior_interpreter_service.BehaviorInterpreterService', MagicMock())
     def test_recovery_edge_cases(self, mock_crud_event, mock_db_session):
@@ -5,7 +5,8 @@
  * 目标：
  * - 捕获 TDD-II-07 中规定的关键事件：
  *   code_edit（Monaco 编辑器防抖 2s）、ai_help_request（立即）、test_submission（立即，包含 code）、dom_element_select（立即，iframe 支持）、user_idle（60s）、page_focus_change（visibility）
- * - 组装标准化 payload 并可靠发送到后端 /api/v1/behavior/log
+ * - 组装标准化 payload 并可靠发送到后端 /api/v1/behavior/log/batch
+ * - 事件先进入队列，按短时间窗口合并为一次批量请求；标记为“立即”的事件会触发立刻发送，页面隐藏时也会立刻发送
  * - 优先使用 navigator.sendBeacon；在不支持时 fallback 到 fetch(..., { keepalive: true })
  *
  * 注意：
@@ -23,12 +24,30 @@ class BehaviorTracker {
     // code_edit 防抖时长（ms）
     this.debounceMs = 2000;
     this.idleTimer = null;
+    // 批量上报：队列中的事件最多等待 flushIntervalMs 后合并发送
+    this.flushIntervalMs = 1000;
+    this.maxBatchSize = 50;
+    this.queue = [];
+    this.flushTimer = null;
+    // 需要后端立即处理的事件，入队后立刻发送整个队列；
+    // page_focus_change 的 blur 发生在页面隐藏时，之后计时器可能不再执行，因此也立即发送
+    this.immediateEvents = new Set(['ai_help_request', 'test_submission', 'dom_element_select', 'page_focus_change']);
+
+    // 页面隐藏/卸载前发送剩余事件
+    try {
+      document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') this.flush();
+      });
+      window.addEventListener('pagehide', () => this.flush());
+    } catch (e) {
+      // ignore
+    }
   }
 
   // -------------------- 核心发送函数 --------------------
   // 优先使用 navigator.sendBeacon，否则使用 fetch keepalive（并在控制台打印错误）
   _sendPayload(payload) {
-    const url = '/api/v1/behavior/log';
+    const url = '/api/v1/behavior/log/batch';
     try {
       if (navigator && typeof navigator.sendBeacon === 'function') {
         const blob = new Blob([JSON.stringify(payload)], { type: 'application/json' });
@@ -49,6 +68,28 @@ class BehaviorTracker {
     }
   }
 
+  // 将队列中的事件作为一个批次发送
+  flush() {
+    if (this.flushTimer) {
+      clearTimeout(this.flushTimer);
+      this.flushTimer = null;
+    }
+    if (this.queue.length === 0) return;
+    const batch = this.queue;
+    this.queue = [];
+    this._sendPayload(batch);
+  }
+
+  // 事件入队；立即事件或队列已满时立刻发送，否则在时间窗口结束时发送
+  _enqueue(payload) {
+    this.queue.push(payload);
+    if (this.immediateEvents.has(payload.event_type) || this.queue.length >= this.maxBatchSize) {
+      this.flush();
+    } else if (!this.flushTimer) {
+      this.flushTimer = setTimeout(() => this.flush(), this.flushIntervalMs);
+    }
+  }
+
   // 公共上报接口：组装标准 payload 并发送
   logEvent(eventType, eventData = {}) {
     // 获取 participant_id（从 session.js 或 window 取）
@@ -74,10 +115,10 @@ class BehaviorTracker {
       participant_id,
       event_type: eventType,
       event_data: eventData,
-      timestamp: new Date().toISOString()
+      timestamp: Date.now()
     };
 
-    this._sendPayload(payload);
+    this._enqueue(payload);
   }
 
   // -------------------- 编辑器（Monaco）相关 --------------------
@@ -88,8 +129,8 @@ class BehaviorTracker {
     // 防抖上报 code_edit
     const debouncedLog = debounce((name, code) => {
       this.logEvent('code_edit', {
-        editorName: name,
-        newLength: code ? code.length : 0,
+        editor_name: name,
+        new_length: code ? code.length : 0,
         // TODO: 如果需要可加入 lineCount: editors[name].getModel().getLineCount()
       });
     }, this.debounceMs);
@@ -189,7 +230,7 @@ class BehaviorTracker {
       if (!tgt) return;
       const selector = this._generateCssSelector(tgt);
       this.logEvent('dom_element_select', {
-        tagName: tgt.tagName,
+        tag_name: tgt.tagName,
         selector,
         position: { x: e.clientX, y: e.clientY }
       });
@@ -901,12 +901,12 @@ function createElementSelectedWithTracking() {
         // 记录到行为追踪器
         try {
             tracker.logEvent('dom_element_select', {
-                tagName: elementInfo.tagName,
+                tag_name: elementInfo.tagName,
                 selector: elementInfo.selector,
                 id: elementInfo.id,
-                className: elementInfo.className,
+                class_name: elementInfo.className,
                 position: elementInfo.bounds,
-                topicId: currentTopicId
+                topic_id: currentTopicId
             });
         } catch (error) {
             console.warn('[MainApp] 行为追踪记录失败:', error);